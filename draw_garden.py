@@ -2,6 +2,7 @@
 import matplotlib
 matplotlib.use('Agg')   # non-interactive backend
 import matplotlib.pyplot as plt
+plt.ioff()
 
 rows = [
     [("sweetcorn#1", 360)],
@@ -19,29 +20,101 @@ rows = [
      ("peppers", 48), ("winter squash", 36), ("celery", 30), ("summer squash", 24)],
 ]
 
-fig, ax = plt.subplots(figsize=(14,9))
-y_positions = list(range(len(rows), 0, -1))
 height = 0.8
 
-for y, row in zip(y_positions, rows):
+# (fig, ax, bars, texts) from the last figure draw() created itself; later calls without fig
+# and with the same number of rows update these artists in place instead of building a new figure
+_cache = None
+
+
+def _row_segments(row, y, seg, cyc):
+    """Return (xranges, colors, labels) for one row; labels are (x, y, text, va, fontsize)."""
+    xranges = []
+    labels = []
     x = 0
     for label, length in row:
-        ax.barh(y, length, left=x, height=height)  # default colors used
+        xranges.append((x, length))
         cx = x + length/2
         if length >= 30:
-            ax.text(cx, y, f"{label}\n{length} in", ha='center', va='center', fontsize=7)
+            labels.append((cx, y, f"{label}\n{length} in", 'center', 7))
         else:
-            ax.text(cx, y+0.25, f"{label} ({length} in)", ha='center', va='bottom', fontsize=6)
+            labels.append((cx, y+0.25, f"{label} ({length} in)", 'bottom', 6))
         x += length
+    colors = [cyc[(seg + i) % len(cyc)] for i in range(len(row))]
+    return xranges, colors, labels
+
+
+def draw(rows, fig=None):
+    """
+    Draw rows (list of lists of (label, length)) as a horizontal bar layout and return the figure.
+    Pass fig to draw into a specific figure; such figures are never reused by later calls.
+    Otherwise the figure draw() created on an earlier call is reused when it has the same number
+    of rows, and only bar geometry/colors and texts change. That figure is redrawn in place, so a
+    figure returned by an earlier call is overwritten - save it (or pass your own fig) first.
+    When a new figure has to be made, the previously cached one is closed.
+    Layout is fitted when a figure is built, not on reuse (axes, ticks and title don't change).
+    """
+    global _cache
+    cyc = plt.rcParams['axes.prop_cycle'].by_key()['color']  # resolved once, not per bar
+    y_positions = list(range(len(rows), 0, -1))
+
+    if fig is None and _cache is not None and len(_cache[2]) == len(rows):
+        fig, ax, bars, texts = _cache
+        seg = 0
+        segment_labels = []
+        for y, row, bar in zip(y_positions, rows, bars):
+            xranges, colors, labels = _row_segments(row, y, seg, cyc)
+            seg += len(row)
+            y0, y1 = y - height/2, y + height/2
+            bar.set_verts([[(x, y0), (x, y1), (x + w, y1), (x + w, y0)] for x, w in xranges])
+            bar.set_facecolor(colors)
+            segment_labels.extend(labels)
+        # reuse existing Text artists, adding or removing only the difference
+        while len(texts) > len(segment_labels):
+            texts.pop().remove()
+        for k, (cx, y, txt, va, fontsize) in enumerate(segment_labels):
+            if k < len(texts):
+                t = texts[k]
+                t.set_position((cx, y))
+                t.set_text(txt)
+                t.set_va(va)
+                t.set_fontsize(fontsize)
+            else:
+                texts.append(ax.text(cx, y, txt, ha='center', va=va, fontsize=fontsize))
+        return fig
+
+    owned = fig is None
+    if owned:
+        if _cache is not None:
+            plt.close(_cache[0])  # it is about to drop out of the cache; don't leave it open in pyplot
+        fig, ax = plt.subplots(figsize=(14,9))
+    else:
+        ax = fig.gca()
+    bars = []
+    texts = []
+    seg = 0  # running segment count, so colors continue through the cycle like one barh per segment
+    for y, row in zip(y_positions, rows):
+        # one broken_barh artist per row instead of one barh per segment
+        xranges, colors, labels = _row_segments(row, y, seg, cyc)
+        seg += len(row)
+        bars.append(ax.broken_barh(xranges, (y - height/2, height), facecolors=colors))
+        for cx, ty, txt, va, fontsize in labels:
+            texts.append(ax.text(cx, ty, txt, ha='center', va=va, fontsize=fontsize))
+
+    ax.set_xlim(0, 360)
+    ax.set_ylim(0.5, len(rows)+0.5)
+    ax.set_yticks(y_positions)
+    ax.set_yticklabels([f"Row {i}" for i in range(1, len(rows)+1)][::-1])
+    ax.set_xlabel("Length along row (inches)")
+    ax.set_title(f"Garden layout — {len(rows)} rows (each 360 in long)")
+    ax.grid(axis='x', linestyle=':', linewidth=0.4)
+    fig.tight_layout()
+    if owned:
+        _cache = (fig, ax, bars, texts)
+    return fig
 
-ax.set_xlim(0, 360)
-ax.set_ylim(0.5, len(rows)+0.5)
-ax.set_yticks(y_positions)
-ax.set_yticklabels([f"Row {i}" for i in range(1,13)][::-1])
-ax.set_xlabel("Length along row (inches)")
-ax.set_title("Garden layout — 12 rows (each 360 in long)")
-ax.grid(axis='x', linestyle=':', linewidth=0.4)
-plt.tight_layout()
-plt.savefig("garden_rows.png", dpi=150, bbox_inches='tight')
-print("Saved garden_rows.png")
 
+if __name__ == "__main__":
+    fig = draw(rows)
+    fig.savefig("garden_rows.png", dpi=150)
+    print("Saved garden_rows.png")
@@ -81,18 +81,10 @@ rows = [[] for _ in range(NUM_ROWS)]
 rows_used = [0]*NUM_ROWS
 
 for length, label, crop in pieces_sorted:
-    # best-fit: place into the row that has smallest leftover after placing
-    best_row = None
-    best_remain = None
-    for i in range(NUM_ROWS):
-        rem = ROW_LEN - rows_used[i]
-        if rem >= length:
-            if best_remain is None or (rem - length) < best_remain:
-                best_remain = rem - length
-                best_row = i
-    if best_row is None:
-        # fallback (shouldn't happen if total_length <= CAP)
-        best_row = max(range(NUM_ROWS), key=lambda i: ROW_LEN - rows_used[i])
+    # best-fit: place into the row that has smallest leftover after placing.
+    # Rows that can't hold the piece sort last; among those the one closest to fitting
+    # (most remaining space) wins, which is the fallback if nothing fits (shouldn't happen if total_length <= CAP)
+    best_row = min(range(NUM_ROWS), key=lambda i: (ROW_LEN - rows_used[i] < length, abs(ROW_LEN - rows_used[i] - length)))
     rows[best_row].append((label, length, crop))
     rows_used[best_row] += length
 
@@ -105,14 +97,20 @@ for i in range(NUM_ROWS):
     print()
 
 # Save CSV for easy import/printing
+def csv_field(s):
+    # minimal quoting, same rules as csv.writer's default dialect
+    if any(ch in s for ch in ',"\r\n'):
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
 try:
-    import csv
+    # build the whole file and write it once (\r\n line endings, as csv.writer produced)
+    lines = ["row,segment_label,length_in,crop"]
+    for i in range(NUM_ROWS):
+        for seg_label, seg_len, crop in rows[i]:
+            lines.append(f"{i+1},{csv_field(seg_label)},{seg_len},{csv_field(crop)}")
     with open("garden_13rows.csv", "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["row","segment_label","length_in","crop"])
-        for i in range(NUM_ROWS):
-            for seg_label, seg_len, crop in rows[i]:
-                w.writerow([i+1, seg_label, seg_len, crop])
+        f.write("\r\n".join(lines) + "\r\n")
     print("Wrote garden_13rows.csv")
 except Exception as e:
     print("Could not write CSV:", e)
@@ -124,17 +122,25 @@ if HAVE_MPL:
     fig, ax = plt.subplots(figsize=(fig_w, fig_h))
     y_positions = list(range(NUM_ROWS, 0, -1))
     height = 0.8
+    cyc = plt.rcParams['axes.prop_cycle'].by_key()['color']  # resolved once, not per bar
+    seg = 0  # running segment count, so colors continue through the cycle like one barh per segment
     for y, row in zip(y_positions, rows):
+        # one broken_barh artist per row instead of one barh per segment
+        xranges = []
         x_pos = 0
         for seg_label, seg_len, crop in row:
-            ax.barh(y, seg_len, left=x_pos, height=height)
+            xranges.append((x_pos, seg_len))
+            x_pos += seg_len
+        colors = [cyc[(seg + i) % len(cyc)] for i in range(len(row))]
+        seg += len(row)
+        ax.broken_barh(xranges, (y - height/2, height), facecolors=colors)
+        for (x_pos, seg_len), (seg_label, _seg_len, crop) in zip(xranges, row):
             cx = x_pos + seg_len/2
             if seg_len >= 30:
                 txt = f"{seg_label}\n{seg_len} in"
                 ax.text(cx, y, txt, ha='center', va='center', fontsize=7)
             else:
                 ax.text(cx, y+0.25, f"{seg_label} ({seg_len} in)", ha='center', va='bottom', fontsize=6)
-            x_pos += seg_len
     ax.set_xlim(0, ROW_LEN)
     ax.set_ylim(0.5, NUM_ROWS + 0.5)
     ax.set_yticks(y_positions)
@@ -143,7 +149,7 @@ if HAVE_MPL:
     ax.set_title(f"Garden layout — {NUM_ROWS} rows × {ROW_LEN} in (x={x:.6f})")
     ax.grid(axis='x', linestyle=':', linewidth=0.4)
     plt.tight_layout()
-    plt.savefig("garden_13rows.png", dpi=150, bbox_inches='tight')
+    plt.savefig("garden_13rows.png", dpi=150)
     print("Wrote garden_13rows.png (if matplotlib installed)")
 else:
     print("matplotlib not available; PNG not produced.")
@@ -5,17 +5,24 @@ garden_scale_pack_flexsplit.py
 Same solver as before but allows unlimited splitting into 360" full chunks + one remainder
 (per-crop), subject to the practical cap that a crop cannot be split into more pieces than NUM_ROWS.
 Uses exact packing (DFS / branch-and-bound) to test feasibility for each candidate multiplier x.
+If Google OR-tools is installed, the CP-SAT solver is used for the packing step instead.
 """
 
-from math import ceil, floor
+from bisect import bisect_left, insort
+import copy
+from functools import lru_cache
+from math import ceil, floor, gcd
 import sys
+try:
+    from ortools.sat.python import cp_model
+    HAVE_ORTOOLS = True
+except Exception:
+    HAVE_ORTOOLS = False
 
 # ------------- User-editable parameters -------------
 NUM_ROWS = 12
 ROW_LEN = 360                     # inches per row
 BED_WIDTH = 36                    # inches (3 ft)
-EPS = 1e-9                        # floating tolerance for binary search
-MAX_ITERS = 60                    # binary search iterations
 # ---------------------------------------------------
 
 # per-person baseline list (name, count_per_person, spacing_in_inches, trellised_flag)
@@ -49,6 +56,7 @@ CAPACITY = NUM_ROWS * ROW_LEN
 
 # ---------------- Utility functions ----------------
 
+@lru_cache(maxsize=4096)
 def compute_crop_total_length(count, spacing, trellised):
     """
     Given an integer count, spacing in inches, and trellised flag,
@@ -71,177 +79,353 @@ def make_pieces_for_crop_flexible(total_length):
     """
     if total_length <= 0:
         return []
-    full_chunks = int(total_length // ROW_LEN)
-    rem = int(total_length % ROW_LEN)
-    pieces = [ROW_LEN] * full_chunks
-    if rem > 0:
-        pieces.append(rem)
+    full_chunks, rem = divmod(int(total_length), ROW_LEN)
     # Practical safety: don't allow more pieces than rows (would be pointless)
-    if len(pieces) > NUM_ROWS:
+    if full_chunks + (rem > 0) > NUM_ROWS:
         return None
-    return pieces
+    return [ROW_LEN] * full_chunks + [rem] * (rem > 0)
 
 
-# Exact packing (DFS / backtracking)
-def pack_pieces_exact(pieces, num_rows=NUM_ROWS, row_len=ROW_LEN):
+def lower_bound_l2(lengths, row_len=ROW_LEN):
     """
-    pieces: list of (length:int, label:str)
-    Try to assign each piece to one of the rows (bins) of capacity row_len.
-    Uses DFS with pruning and symmetry-breaking.
-    Returns: (True, rows) if feasible, where rows is list of lists of (label, length).
-             (False, None) otherwise.
+    Martello-Toth L2 lower bound on the number of rows needed for the given piece lengths.
+    For each threshold a <= row_len/2: pieces longer than row_len - a each need their own row,
+    pieces in (row_len/2, row_len - a] need one row each too, and pieces in [a, row_len/2]
+    must fit in the space those rows leave free or open new ones.
     """
-    pieces_sorted = sorted(pieces, key=lambda x: x[0], reverse=True)
-    n = len(pieces_sorted)
+    half = row_len / 2
+    best = ceil(sum(lengths) / row_len) if lengths else 0
+    for a in {0} | {length for length in lengths if length <= half}:
+        n_big = 0
+        n_mid = 0
+        free_mid = 0
+        small_sum = 0
+        for length in lengths:
+            if length > row_len - a:
+                n_big += 1
+            elif length > half:
+                n_mid += 1
+                free_mid += row_len - length
+            elif length >= a:
+                small_sum += length
+        bound = n_big + n_mid + max(0, ceil((small_sum - free_mid) / row_len))
+        if bound > best:
+            best = bound
+    return best
+
+
+# Exact packing (CP-SAT model, used when OR-tools is available)
+def pack_pieces_cpsat_sorted(lengths_sorted, labels_sorted, num_rows=NUM_ROWS, row_len=ROW_LEN):
+    """
+    Same contract as pack_pieces_exact_sorted, solved as a bin-assignment model:
+    boolean x[i, r] for piece i in row r, each piece in exactly one row,
+    row loads <= row_len. Rows are filled in order (row r+1 may only be
+    used if row r is) to break symmetry between identical empty rows.
+    """
+    n = len(lengths_sorted)
+    if n == 0:
+        return True, [[] for _ in range(num_rows)]
+
+    model = cp_model.CpModel()
+    x = {}
+    for i in range(n):
+        for r in range(num_rows):
+            x[i, r] = model.NewBoolVar(f"x_{i}_{r}")
+        model.AddExactlyOne(x[i, r] for r in range(num_rows))
+    used = [model.NewBoolVar(f"used_{r}") for r in range(num_rows)]
+    for r in range(num_rows):
+        model.Add(sum(lengths_sorted[i] * x[i, r] for i in range(n)) <= row_len)
+        for i in range(n):
+            model.AddImplication(x[i, r], used[r])
+        if r + 1 < num_rows:
+            model.Add(used[r] >= used[r + 1])
+    # the largest piece can always go in the first row
+    model.Add(x[0, 0] == 1)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return False, None
 
-    rows_used = [0] * num_rows
     rows_content = [[] for _ in range(num_rows)]
+    for i in range(n):
+        for r in range(num_rows):
+            if solver.Value(x[i, r]):
+                rows_content[r].append((labels_sorted[i], lengths_sorted[i]))
+                break
+    return True, rows_content
+
+
+def pack_pieces_cpsat(lengths, labels, num_rows=NUM_ROWS, row_len=ROW_LEN):
+    """
+    Same contract as pack_pieces_exact, via the CP-SAT model (pieces are sorted first).
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    return pack_pieces_cpsat_sorted([lengths[i] for i in order], [labels[i] for i in order],
+                                    num_rows, row_len)
 
-    seen_states = set()
 
-    def dfs(index):
+# Exact packing (DFS / backtracking)
+def _dfs(lengths, suffix_sum, suffix_reach, rows_used, caps_sorted, assignment, row_len, seen_states):
+    """
+    Array-based DFS over pieces (lengths sorted descending), run as a loop over an explicit
+    stack rather than by recursion. The stack holds one frame per placed depth:
+    (state_key, iterator over candidate (row, remaining) pairs); placed[d] is the row choice
+    currently applied at depth d.
+    suffix_sum[i] is sum(lengths[i:]); suffix_reach[i] is a bitset of the subset sums
+    of lengths[i:] that are <= row_len (bit s set if some subset adds up to s).
+    rows_used[r] is the load of row r; caps_sorted holds the same rows' remaining
+    capacities in ascending order and is kept in step with rows_used.
+    assignment[i] receives the row of piece i.
+    Returns True as soon as every piece has been placed.
+    """
+    n = len(lengths)
+    num_rows = len(rows_used)
+    bits = row_len.bit_length()
+    stack = []
+    placed = []
+
+    while True:
+        # expand the node for the next unplaced piece
+        index = len(stack)
         if index >= n:
             return True
-        length, label = pieces_sorted[index]
-        rem_caps = tuple(sorted([row_len - u for u in rows_used], reverse=True))
-        state_key = (index, rem_caps)
-        if state_key in seen_states:
+        length = lengths[index]
+        expand = True
+
+        # capacity bound: some row must fit the current piece, and the remaining lengths must fit
+        # in the free space minus what each row is bound to waste. A row with c free can at best be
+        # filled to the largest remaining subset sum <= c (read off the subset-sum bitset).
+        if length > caps_sorted[-1]:
+            expand = False
+        else:
+            reach = suffix_reach[index]
+            usable_free = 0
+            for c in caps_sorted:
+                usable_free += (reach & ((2 << c) - 1)).bit_length() - 1
+            if suffix_sum[index] > usable_free:
+                expand = False
+
+        if expand:
+            # state fingerprint: index plus the sorted remaining capacities, packed into one int
+            # (each capacity needs row_len.bit_length() bits) instead of hashing a tuple
+            state_key = index
+            for c in caps_sorted:
+                state_key = (state_key << bits) | c
+            if state_key in seen_states:
+                expand = False
+
+        if expand:
+            candidate_rows = []
+            for r in range(num_rows):
+                rem = row_len - rows_used[r]
+                if rem >= length:
+                    # symmetry: rows are opened in order, so never open row r while row r-1 is still empty
+                    if rows_used[r] == 0 and r > 0 and rows_used[r - 1] == 0:
+                        continue
+                    candidate_rows.append((rem - length, -rem, r))
+            candidate_rows.sort()
+            stack.append((state_key, iter(candidate_rows)))
+
+        # advance: undo the top frame's current choice and apply its next one,
+        # popping exhausted frames (and remembering them as dead states) on the way
+        while stack:
+            depth = len(stack) - 1
+            length = lengths[depth]
+            if len(placed) > depth:
+                r, rem = placed.pop()
+                rows_used[r] -= length
+                del caps_sorted[bisect_left(caps_sorted, rem - length)]
+                insort(caps_sorted, rem)
+            state_key, candidates = stack[-1]
+            nxt = next(candidates, None)
+            if nxt is None:
+                seen_states.add(state_key)
+                stack.pop()
+                continue
+            _, neg_rem, r = nxt
+            rem = -neg_rem
+            del caps_sorted[bisect_left(caps_sorted, rem)]
+            insort(caps_sorted, rem - length)
+            rows_used[r] += length
+            assignment[depth] = r
+            placed.append((r, rem))
+            break
+        else:
             return False
 
-        candidate_rows = []
-        for r in range(num_rows):
-            rem = row_len - rows_used[r]
-            if rem >= length:
-                candidate_rows.append((rem - length, rem, r))
-        candidate_rows.sort(key=lambda x: (x[0], -x[1]))
-
-        for _, _, r in candidate_rows:
-            # symmetry: only place into the first empty row when placing into an empty row
-            if rows_used[r] == 0:
-                first_empty = None
-                for k in range(num_rows):
-                    if rows_used[k] == 0:
-                        first_empty = k
-                        break
-                if r != first_empty:
-                    continue
 
-            rows_used[r] += length
-            rows_content[r].append((label, length))
+def pack_pieces_exact_sorted(lengths_sorted, labels_sorted, num_rows=NUM_ROWS, row_len=ROW_LEN):
+    """
+    Same as pack_pieces_exact, for pieces already sorted by length, descending.
+    Skips the sort, for callers that have the sorted order anyway.
+    """
+    if HAVE_ORTOOLS:
+        return pack_pieces_cpsat_sorted(lengths_sorted, labels_sorted, num_rows, row_len)
+
+    n = len(lengths_sorted)
+    suffix_sum = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum[i] = suffix_sum[i + 1] + lengths_sorted[i]
+    row_mask = (2 << row_len) - 1
+    suffix_reach = [1] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_reach[i] = (suffix_reach[i + 1] | (suffix_reach[i + 1] << lengths_sorted[i])) & row_mask
+    rows_used = [0] * num_rows
+    assignment = [-1] * n
 
-            if rows_used[r] <= row_len:
-                if dfs(index + 1):
-                    return True
+    caps_sorted = [row_len] * num_rows
 
-            rows_used[r] -= length
-            rows_content[r].pop()
+    if not _dfs(lengths_sorted, suffix_sum, suffix_reach, rows_used, caps_sorted, assignment, row_len, set()):
+        return False, None
 
-        seen_states.add(state_key)
-        return False
+    rows_content = [[] for _ in range(num_rows)]
+    for length, label, r in zip(lengths_sorted, labels_sorted, assignment):
+        rows_content[r].append((label, length))
+    return True, rows_content
 
-    ok = dfs(0)
-    if ok:
-        return True, rows_content
-    return False, None
+
+def pack_pieces_exact(lengths, labels, num_rows=NUM_ROWS, row_len=ROW_LEN):
+    """
+    lengths: list of piece lengths (int); labels: matching list of piece labels (str),
+    only used to build the returned rows - the search itself works on lengths alone.
+    Try to assign each piece to one of the rows (bins) of capacity row_len.
+    Uses DFS with pruning and symmetry-breaking (or CP-SAT if OR-tools is installed).
+    Returns: (True, rows) if feasible, where rows is list of lists of (label, length).
+             (False, None) otherwise.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    return pack_pieces_exact_sorted([lengths[i] for i in order], [labels[i] for i in order],
+                                    num_rows, row_len)
 
 
 # ---------- Feasibility tester for given x ----------
-def feasible_for_x(x, per_person_list=PER_PERSON):
+@lru_cache(maxsize=None)
+def _feasible_from_counts(counts, per_person):
     """
-    Given multiplier x (float), compute scaled counts = ceil(orig * x),
-    compute pieces (multiple full 360" chunks + remainder), check capacity and attempt exact packing.
+    counts: tuple of scaled plant counts, aligned with per_person (a tuple of crop entries).
+    Compute pieces (multiple full 360" chunks + remainder), check capacity and attempt exact packing.
+    Cached, since many values of x map to the same integer vector. The cached info dict is shared,
+    so callers go through feasible_for_counts, which hands out a copy.
     """
+    if len(counts) != len(per_person):
+        raise ValueError(f"got {len(counts)} counts for {len(per_person)} crops")
     scaled_counts = {}
-    pieces = []  # (length,label)
+    lengths = []
+    labels = []
     total_length = 0
 
-    for name, per_count, spacing, trellised in per_person_list:
-        sc = int(ceil(per_count * x))
+    for sc, (name, _per_count, spacing, trellised) in zip(counts, per_person):
         scaled_counts[name] = sc
         total_len = compute_crop_total_length(sc, spacing, trellised)
         piece_list = make_pieces_for_crop_flexible(total_len)
         if piece_list is None:
-            return False, {"reason": f"Crop '{name}' would require {int(total_len/ROW_LEN + (1 if total_len%ROW_LEN else 0))} pieces which exceeds {NUM_ROWS} rows - infeasible at this x."}
+            return False, {"reason": f"Crop '{name}' would require {-(-total_len // ROW_LEN)} pieces which exceeds {NUM_ROWS} rows - infeasible at this x."}
         # label pieces
+        lengths.extend(piece_list)
         if len(piece_list) == 1:
-            pieces.append((int(piece_list[0]), name))
+            labels.append(name)
         else:
-            for idx, L in enumerate(piece_list, start=1):
-                pieces.append((int(L), f"{name}#{idx}"))
+            labels.extend(f"{name}#{idx}" for idx in range(1, len(piece_list) + 1))
         total_length += total_len
 
     if total_length > CAPACITY:
         return False, {"reason": f"Total required length {total_length} in exceeds garden capacity {CAPACITY} in."}
 
-    feasible, rows = pack_pieces_exact(pieces, NUM_ROWS, ROW_LEN)
+    l2 = lower_bound_l2(lengths, ROW_LEN)
+    if l2 > NUM_ROWS:
+        return False, {"reason": f"Pieces need at least {l2} rows (L2 bound) but only {NUM_ROWS} exist.", "lengths": lengths, "labels": labels}
+
+    # sorted once per integer vector (this function is cached), then handed to the search as-is
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    feasible, rows = pack_pieces_exact_sorted([lengths[i] for i in order], [labels[i] for i in order],
+                                              NUM_ROWS, ROW_LEN)
     if not feasible:
-        return False, {"reason": "No packing found for these pieces (exact search failed).", "pieces": pieces}
+        return False, {"reason": "No packing found for these pieces (exact search failed).", "lengths": lengths, "labels": labels}
     waste = CAPACITY - total_length
-    return True, {"scaled_counts": scaled_counts, "pieces": pieces, "rows": rows, "total_length": total_length, "waste": waste}
+    return True, {"scaled_counts": scaled_counts, "lengths": lengths, "labels": labels, "rows": rows, "total_length": total_length, "waste": waste}
 
 
-# ---------- Binary search for maximum x ----------
-def find_max_x(per_person_list=PER_PERSON):
-    lo = 0.0
-    hi = 1.0
-    f_hi, _ = feasible_for_x(hi, per_person_list)
-    while f_hi:
-        lo = hi
-        hi *= 2.0
-        if hi > 1e6:
-            break
-        f_hi, _ = feasible_for_x(hi, per_person_list)
+def feasible_for_counts(counts, per_person_list=PER_PERSON):
+    """
+    Test an explicit integer vector of scaled counts (aligned with per_person_list).
+    Returns (feasible, info); info is a new dict on every call, safe for the caller to modify.
+    """
+    feasible, info = _feasible_from_counts(tuple(counts), tuple(per_person_list))
+    return feasible, copy.deepcopy(info)
 
-    best_result = None
 
-    for it in range(MAX_ITERS):
-        mid = (lo + hi) / 2.0
-        feasible, result = feasible_for_x(mid, per_person_list)
+def feasible_for_x(x, per_person_list=PER_PERSON):
+    """
+    Given multiplier x (float), compute scaled counts = ceil(orig * x) and test that integer vector.
+    """
+    counts = tuple(ceil(per_count * x) for _name, per_count, _, _ in per_person_list)
+    return feasible_for_counts(counts, per_person_list)
+
+
+# ---------- Search over breakpoints for maximum x ----------
+def x_upper_bound(per_person_list=PER_PERSON):
+    """
+    Closed-form upper bound on feasible x. Since ceil(orig * x) >= orig * x, a crop needs at
+    least orig * x * spacing inches (trellised) or orig * x * spacing / cols inches (bedded),
+    and all crops together must fit in CAPACITY. This also covers each crop's own cap of
+    NUM_ROWS full rows. A tiny slack keeps float rounding from dropping the last breakpoint.
+    """
+    per_unit_length = 0.0
+    for _name, orig_cnt, spacing, trellised in per_person_list:
+        cols = 1 if trellised else max(1, BED_WIDTH // spacing)
+        per_unit_length += orig_cnt * spacing / cols
+    if per_unit_length <= 0:
+        return 0.0
+    return CAPACITY / per_unit_length * (1 + 1e-9)
+
+
+def find_max_x(per_person_list=PER_PERSON):
+    """
+    The scaled vector ceil(orig * x) only changes at breakpoints x = k / orig, and the
+    largest x giving a particular vector is always such a breakpoint. So instead of
+    bisecting the reals, bisect the sorted list of breakpoints up to a closed-form upper bound.
+    """
+    hi = x_upper_bound(per_person_list)
+
+    # Breakpoints are kept as reduced (k, orig) pairs and the vectors computed with integer ceil.
+    # Between two distinct breakpoints at least one crop's count steps up, so every candidate
+    # is a distinct integer vector: bisection never revisits a vector, and once lo and hi are
+    # adjacent the vector has nothing left to change, which is exactly when the loop stops.
+    breakpoints = sorted({(k // gcd(k, orig_cnt), orig_cnt // gcd(k, orig_cnt))
+                          for _name, orig_cnt, _, _ in per_person_list if orig_cnt > 0
+                          for k in range(1, int(orig_cnt * hi) + 1)},
+                         key=lambda bp: bp[0] / bp[1])
+    per_person = tuple(per_person_list)
+
+    def counts_at(bp):
+        # ceil(cnt * k / den) in integer arithmetic: evaluating ceil(cnt * (k / den)) in floats
+        # can round up past the breakpoint, e.g. ceil(11 * (25 / 11)) == 26
+        k, den = bp
+        return tuple(-(-cnt * k // den) for _name, cnt, _, _ in per_person)
+
+    # invariant: breakpoints[lo] feasible (or lo == -1), breakpoints[hi] infeasible (or hi == len)
+    lo_idx, hi_idx = -1, len(breakpoints)
+    best_result = None
+    while hi_idx - lo_idx > 1:
+        mid = (lo_idx + hi_idx) // 2
+        feasible, result = feasible_for_counts(counts_at(breakpoints[mid]), per_person)
         if feasible:
-            lo = mid
+            lo_idx = mid
             best_result = result
         else:
-            hi = mid
-        if hi - lo < EPS:
-            break
+            hi_idx = mid
+
+    if best_result is None:
+        return 0.0, None
 
-    # refine final integer vector and compute exact maximum x allowed by those ceilings
-    final_scaled = {name: int(ceil(cnt * lo)) for name, cnt, _, _ in per_person_list}
-    upper_bounds = []
-    for name, orig_cnt, _, _ in per_person_list:
-        k = final_scaled[name]
-        if orig_cnt > 0:
-            upper_bounds.append(k / orig_cnt)
-    x_final = min(upper_bounds) if upper_bounds else lo
-
-    # recompute result for exact integer vector
-    def feasible_for_counts(explicit_counts):
-        pieces = []
-        total_length = 0
-        for name, per_count, spacing, trellised in per_person_list:
-            sc = explicit_counts[name]
-            total_len = compute_crop_total_length(sc, spacing, trellised)
-            piece_list = make_pieces_for_crop_flexible(total_len)
-            if piece_list is None:
-                return False, {"reason": f"Crop '{name}' requires too many pieces (> {NUM_ROWS})"}
-            if len(piece_list) == 1:
-                pieces.append((piece_list[0], name))
-            else:
-                for idx, L in enumerate(piece_list, start=1):
-                    pieces.append((L, f"{name}#{idx}"))
-            total_length += total_len
-        if total_length > CAPACITY:
-            return False, {"reason": "Total length exceeds capacity"}
-        feasible, rows = pack_pieces_exact(pieces, NUM_ROWS, ROW_LEN)
-        if not feasible:
-            return False, {"reason": "No packing found for final integer counts."}
-        return True, {"scaled_counts": explicit_counts, "pieces": pieces, "rows": rows, "total_length": total_length, "waste": CAPACITY - total_length}
-
-    ok_final, final_result = feasible_for_counts(final_scaled)
-    if not ok_final:
-        # fallback to best_result found during search
-        return lo, best_result
-    return x_final, final_result
+    # exact maximum x allowed by the final integer vector
+    final_scaled = best_result["scaled_counts"]
+    upper_bounds = [final_scaled[name] / orig_cnt
+                    for name, orig_cnt, _, _ in per_person_list if orig_cnt > 0]
+    x_final = min(upper_bounds) if upper_bounds else breakpoints[lo_idx][0] / breakpoints[lo_idx][1]
+    return x_final, best_result
 
 
 # ----------------- Run and output -------------------
@@ -263,7 +447,7 @@ def main():
         print(f" - {name:30s} -> {sc:4d} plants; spacing={spacing:3d} in; trellised={trellised}")
 
     print("\nPiece breakdown (crop pieces used):")
-    for length, label in result['pieces']:
+    for length, label in zip(result['lengths'], result['labels']):
         print(f" - {label:30s} : {length} in")
 
     print("\nRow-by-row assignment:\n")